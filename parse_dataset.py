@@ -1,95 +1,195 @@
-import json
+import asyncio
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from io import BytesIO
-from zipfile import ZipFile
+import sys
 
-import requests
-from tqdm import tqdm
+import httpx
+import orjson
+from stream_unzip import async_stream_unzip
+from tqdm.asyncio import tqdm
 
+CHUNK_SIZE = 65536
+MAX_CONCURRENT_DOWNLOADS = 64  # Default; override with PARSE_MAX_WORKERS
 
-def process_problem(item):
-    problem_id, problem_info = item
-    if problem_id not in [
+_ALLOWED_PROBLEMS = frozenset(
+    {
         "259_bronze_cow_race",
         "396_bronze_secret_code",
         "987_bronze_word_processor",
         "1179_bronze_herdle",
         "1301_bronze_watching_mooloo",
-    ]:
+    }
+)
+_CONFIG_KEYS = (
+    "problem_id",
+    "cp_id",
+    "problem_level",
+    "name",
+    "description",
+    "test_data_link",
+    "num_tests",
+    "runtime_limit",
+    "memory_limit",
+    "description_no_samples",
+    "num_samples",
+    "samples",
+)
+
+
+def is_downloaded(problem_path, num_tests):
+    """
+    Check whether a previous run completed. config.json is written only once all
+    test data is in place, so its presence marks a complete download.
+    """
+    try:
+        present = set(os.listdir(problem_path))
+    except FileNotFoundError:
+        return False
+    expected = {"config.json"}
+    for i in range(1, num_tests + 1):
+        expected.update((f"{i}.in", f"{i}.out"))
+    return expected <= present
+
+
+def write_file(path, data):
+    """Write data to path atomically, so readers never see a partial file."""
+    part_path = path + ".part"
+    with open(part_path, "wb") as f:
+        f.write(data)
+    os.replace(part_path, path)
+
+
+def entry_path(problem_path, file_name):
+    """
+    Return where an archive entry should be extracted, or None if its name
+    points outside problem_path (an absolute path or one with ".." parts).
+    """
+    # Like ZipFile, fall back to cp437 for names that are not UTF-8. stream-unzip
+    # does not expose the UTF-8 flag, so valid UTF-8 names are taken as UTF-8.
+    try:
+        name = file_name.decode("utf-8")
+    except UnicodeDecodeError:
+        name = file_name.decode("cp437")
+
+    root = os.path.realpath(problem_path)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath((root, path)) != root:
+        return None
+    return path
+
+
+def get_max_downloads(default):
+    """Read the download concurrency from PARSE_MAX_WORKERS, if it is set."""
+    value = os.environ.get("PARSE_MAX_WORKERS")
+    if value is None:
+        return default
+    try:
+        max_downloads = int(value)
+    except ValueError:
+        max_downloads = 0
+    if max_downloads < 1:
+        sys.exit(f"PARSE_MAX_WORKERS must be a positive integer, got {value!r}")
+    return max_downloads
+
+
+async def process_problem(client, semaphore, item):
+    problem_id, problem_info = item
+    if problem_id not in _ALLOWED_PROBLEMS:
         return None
 
     outpu_path = "problems"
-    key_list = [
-        "problem_id",
-        "cp_id",
-        "problem_level",
-        "name",
-        "description",
-        "test_data_link",
-        "num_tests",
-        "runtime_limit",
-        "memory_limit",
-        "description_no_samples",
-        "num_samples",
-        "samples",
-    ]
 
     try:
         problem_path = os.path.join(outpu_path, problem_id)
+        if is_downloaded(problem_path, problem_info["num_tests"]):
+            return f"Cached {problem_id}"
         os.makedirs(problem_path, exist_ok=True)
 
-        config = {k: problem_info[k] for k in key_list}
-        filename = os.path.join(problem_path, "config.json")
-        with open(filename, "w") as f:
-            json.dump(config, f, indent=4)
-
-        response = requests.get(config["test_data_link"], timeout=30)
-        response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
+        config = {k: problem_info[k] for k in _CONFIG_KEYS}
+        url = config["test_data_link"]
+        async with semaphore, client.stream("GET", url) as response:
+            response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
 
-        with ZipFile(BytesIO(response.content)) as zip_ref:
-            zip_ref.extractall(problem_path)
+            # Decompress entries as the archive arrives instead of buffering it
+            entries = async_stream_unzip(response.aiter_bytes(CHUNK_SIZE))
+            async for file_name, _, unzipped_chunks in entries:
+                file_path = entry_path(problem_path, file_name)
+                if file_path is None:
+                    return (
+                        f"Error for {problem_id}: Unsafe path in archive: {file_name}"
+                    )
+                if file_name.endswith(b"/"):
+                    os.makedirs(file_path, exist_ok=True)
+                    async for _ in unzipped_chunks:  # Entries must be fully consumed
+                        pass
+                    continue
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                # Write under a temporary name so an interrupted download never
+                # leaves a truncated file behind under the real one
+                part_path = file_path + ".part"
+                with open(part_path, "wb") as f:
+                    async for chunk in unzipped_chunks:
+                        f.write(chunk)
+                os.replace(part_path, file_path)
 
         # Validate that all test case files exist
         for i in range(1, config["num_tests"] + 1):
             in_file = os.path.join(problem_path, f"{i}.in")
             out_file = os.path.join(problem_path, f"{i}.out")
             if not os.path.exists(in_file):
-                in_file = os.path.join(problem_path, f"I.{i}")
-                if os.path.exists(in_file):
-                    new_in_file = os.path.join(problem_path, f"{i}.in")
-                    os.rename(in_file, new_in_file)
+                alt_in_file = os.path.join(problem_path, f"I.{i}")
+                if os.path.exists(alt_in_file):
+                    os.rename(alt_in_file, in_file)
                 else:
-                    return f"Error for {problem_id}: Missing input file for test case {i}: {in_file}"
+                    return f"Error for {problem_id}: Missing input file for test case {i}: {alt_in_file}"
             if not os.path.exists(out_file):
-                out_file = os.path.join(problem_path, f"O.{i}")
-                if os.path.exists(out_file):
-                    new_out_file = os.path.join(problem_path, f"{i}.out")
-                    os.rename(out_file, new_out_file)
+                alt_out_file = os.path.join(problem_path, f"O.{i}")
+                if os.path.exists(alt_out_file):
+                    os.rename(alt_out_file, out_file)
                 else:
-                    return f"Error for {problem_id}: Missing output file for test case {i}: {out_file}"
+                    return f"Error for {problem_id}: Missing output file for test case {i}: {alt_out_file}"
+
+        # The config is written last, so it marks the problem as complete
+        write_file(
+            os.path.join(problem_path, "config.json"),
+            orjson.dumps(config, option=orjson.OPT_INDENT_2),
+        )
         return f"Successfully processed {problem_id}"
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return f"Failed to download for {problem_id}: {e}"
     except Exception as e:
         return f"An error occurred while processing {problem_id}: {e}"
 
 
-def parse_dataset():
+async def parse_dataset():
     input_json_path = "usaco_subset307_dict.json"
 
-    with open(input_json_path, "r") as json_file:
-        data = json.load(json_file)
+    with open(input_json_path, "rb") as json_file:
+        data = orjson.loads(json_file.read())
 
-    max_workers = os.cpu_count()
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(process_problem, item) for item in data.items()]
-        for future in tqdm(
-            as_completed(futures), total=len(futures), desc="Processing problems"
+    # Downloads are network-bound, so concurrency does not depend on CPU count
+    default_downloads = max(1, min(MAX_CONCURRENT_DOWNLOADS, len(data)))
+    max_downloads = get_max_downloads(default_downloads)
+
+    # A single pooled client lets all downloads share connections and TLS sessions
+    semaphore = asyncio.Semaphore(max_downloads)
+    # Keep every in-flight connection alive for reuse by the next download
+    limits = httpx.Limits(
+        max_connections=max_downloads, max_keepalive_connections=max_downloads
+    )
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=30) as client:
+        tasks = [process_problem(client, semaphore, item) for item in data.items()]
+        errors = []
+        for task in tqdm.as_completed(
+            tasks, total=len(tasks), desc="Processing problems"
         ):
-            result = future.result()
+            result = await task
             if result and ("Error" in result or "Failed" in result):
-                print(result)
+                errors.append(result)
+
+    # Report errors once the progress bar is done, so they don't interleave
+    if errors:
+        print("\n".join(errors))
 
 
-parse_dataset()
+if __name__ == "__main__":
+    asyncio.run(parse_dataset())
@@ -1,3 +1,4 @@
+import functools
 import os
 import time
 from typing import Any
@@ -5,7 +6,7 @@ from typing import Any
 from a2a.server.tasks import TaskUpdater
 from a2a.types import DataPart, Message, Part, TaskState, TextPart
 from a2a.utils import get_message_text, new_agent_text_message
-from datasets import load_dataset
+from datasets import Dataset, load_dataset
 from loguru import logger
 from pydantic import BaseModel, HttpUrl, ValidationError
 
@@ -13,6 +14,24 @@ from judge import Judge
 from messenger import Messenger
 
 
+@functools.lru_cache(maxsize=1)
+def load_problems(dataset_id: str) -> tuple[Dataset, dict[str, int]]:
+    """Load the benchmark dataset once and index its rows by problem ID."""
+    dataset = load_dataset(dataset_id, split="train")
+    row_index = {pid: row for row, pid in enumerate(dataset["problem_id"])}
+    return dataset, row_index
+
+
+@functools.lru_cache(maxsize=16)
+def get_judge(dataset_id: str, problem_id: str) -> Judge:
+    """
+    Build a judge once per problem and share it across evaluations. Each judge
+    holds its problem's encoded test data, so only recent problems are kept.
+    """
+    dataset, row_index = load_problems(dataset_id)
+    return Judge(dataset[row_index[problem_id]])
+
+
 class EvalRequest(BaseModel):
     """Request format sent by the AgentBeats platform to green agents."""
 
@@ -68,8 +87,7 @@ class Agent:
             return
 
         dataset_id = os.environ.get("DATASET_ID", "dapumptu/usaco_benchmark")
-        dataset = load_dataset(dataset_id, split="train")
-        dataset_size = len(dataset)
+        dataset, row_index = load_problems(dataset_id)
 
         logger.info(f"Starting evaluation: {request}")
         start_time = time.time()
@@ -78,19 +96,26 @@ class Agent:
         participant_id = "agent"
         purple_agent_url = str(request.participants[participant_id])
 
-        logger.info(f"Running {dataset_size} tasks")
+        # Look up only the requested problems, keeping the dataset order
+        if problem_ids:
+            rows = sorted(
+                row_index[pid] for pid in set(problem_ids) if pid in row_index
+            )
+        else:
+            rows = range(len(dataset))
+
+        logger.info(f"Running {len(rows)} tasks")
         await updater.update_status(
             TaskState.working,
-            new_agent_text_message(f"Starting evaluation of {dataset_size} tasks"),
+            new_agent_text_message(f"Starting evaluation of {len(rows)} tasks"),
         )
 
         metrics: dict[str, Any] = {"pass_1": 0, "time": 0, "tasks": {}}
 
         try:
-            for data in dataset:
+            for row in rows:
+                data = dataset[row]
                 problem_id = data["problem_id"]
-                if problem_ids and problem_id not in problem_ids:
-                    continue
 
                 logger.info(f"Running task {problem_id}...")
                 await updater.update_status(
@@ -99,7 +124,7 @@ class Agent:
                 )
 
                 try:
-                    judge = Judge(data)
+                    judge = get_judge(dataset_id, problem_id)
                     problem_description = data["description"]
 
                     response = await self.messenger.talk_to_agent(
@@ -113,7 +138,7 @@ class Agent:
                     )
                     logger.info("Starting evaluation.")
 
-                    result = judge.run_all_tests(response)
+                    result = await judge.run_all_tests(response)
 
                     logger.info(f"Evaluation result: {result}")
 
@@ -1,10 +1,41 @@
-from typing import Tuple, Optional
+from itertools import zip_longest
+from typing import Iterator, Tuple, Optional
 
-def compare_outputs(actual_output: str, expected_output: str) -> Tuple[str, Optional[str]]:
+def _iter_lines(output: bytes) -> Iterator[bytes]:
+    """
+    Yields the lines of an output with trailing whitespace stripped, after
+    stripping leading/trailing whitespace from the whole block. Lines are
+    sliced out one at a time, so a caller that stops early never splits the rest.
+    """
+    output = output.strip()
+    if not output:
+        return
+    if b"\r" in output:
+        # Handle different line endings (CRLF or CR vs LF) like splitlines()
+        output = output.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    start = 0
+    while (end := output.find(b"\n", start)) != -1:
+        yield output[start:end].rstrip()
+        start = end + 1
+    yield output[start:].rstrip()
+
+def _first_diff_line(actual_output: bytes, expected_output: bytes) -> Optional[Tuple[int, Optional[bytes], Optional[bytes]]]:
+    """
+    Returns the first mismatching line number with the actual and expected
+    lines (None past the end of an output), or None if all lines match.
+    """
+    lines = zip_longest(_iter_lines(actual_output), _iter_lines(expected_output))
+    for lineno, (actual_line, expected_line) in enumerate(lines, start=1):
+        if actual_line != expected_line:
+            return lineno, actual_line, expected_line
+    return None
+
+def compare_outputs(actual_output: bytes, expected_output: bytes) -> Tuple[str, Optional[str]]:
     """
     Compares the actual output of a solution with the expected output.
 
-    It normalizes whitespace and line endings.
+    It normalizes whitespace and line endings. Outputs are compared as raw
+    bytes and only decoded to build the diff message.
 
     Args:
         actual_output: The stdout captured from the solution.
@@ -14,27 +45,23 @@ def compare_outputs(actual_output: str, expected_output: str) -> Tuple[str, Opti
         A tuple containing the verdict ("Accepted" or "Wrong Answer") and
         a detailed message for "Wrong Answer", otherwise None.
     """
-    # Normalize by stripping leading/trailing whitespace from the whole block
-    # and splitting into lines. This handles different line endings (CRLF vs LF).
-    actual_lines = actual_output.strip().splitlines()
-    expected_lines = expected_output.strip().splitlines()
-
-    # Strip trailing whitespace from each line
-    actual_lines = [line.rstrip() for line in actual_lines]
-    expected_lines = [line.rstrip() for line in expected_lines]
+    # Fast path: identical outputs, or ones that differ only in trailing
+    # whitespace, are accepted without splitting them into lines
+    if actual_output == expected_output:
+        return "Accepted", None
+    if actual_output.rstrip() == expected_output.rstrip():
+        return "Accepted", None
 
-    if actual_lines == expected_lines:
+    # Compare line by line, stopping at the first mismatch
+    mismatch = _first_diff_line(actual_output, expected_output)
+    if mismatch is None:
         return "Accepted", None
 
     # Provide a detailed diff for debugging
-    max_lines = max(len(actual_lines), len(expected_lines))
-    for i in range(max_lines):
-        actual_line = actual_lines[i] if i < len(actual_lines) else "[EOF]"
-        expected_line = expected_lines[i] if i < len(expected_lines) else "[EOF]"
-        if actual_line != expected_line:
-            diff_message = (f"Mismatch at line {i+1}:\n"
-                            f"  Expected: {expected_line}\n"
-                            f"  Got     : {actual_line}")
-            return "Wrong Answer", diff_message
-
-    return "Wrong Answer", "Unknown difference." # Should not be reached
\ No newline at end of file
+    lineno, actual_line, expected_line = mismatch
+    actual_line = b"[EOF]" if actual_line is None else actual_line
+    expected_line = b"[EOF]" if expected_line is None else expected_line
+    diff_message = (f"Mismatch at line {lineno}:\n"
+                    f"  Expected: {expected_line.decode(errors='replace')}\n"
+                    f"  Got     : {actual_line.decode(errors='replace')}")
+    return "Wrong Answer", diff_message
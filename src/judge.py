@@ -1,22 +1,93 @@
 import argparse
+import asyncio
+import contextlib
 import json
 import os
-import subprocess
+import py_compile
+import signal
 import sys
 import tempfile
-from typing import Any, Dict, NamedTuple, Optional
+import warnings
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
 
 from evaluator import compare_outputs
 
+RUNNER_PATH = os.path.join(os.path.dirname(__file__), "solution_runner.py")
+CGROUP_CPU_MAX_PATH = "/sys/fs/cgroup/cpu.max"
+
 
 def get_problem_path(problem_id: str) -> str:
     return f"problems/{problem_id}"
 
 
+def get_max_runners() -> int:
+    """
+    Returns how many runners to start: JUDGE_MAX_RUNNERS if it is set,
+    otherwise the CPUs this process may run on, capped by the cgroup CPU quota
+    (os.cpu_count() reports every host CPU, even inside a container).
+    """
+    override = os.environ.get("JUDGE_MAX_RUNNERS")
+    if override:
+        return max(1, int(override))
+
+    try:
+        num_cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS and Windows
+        num_cpus = os.cpu_count() or 1
+
+    try:
+        with open(CGROUP_CPU_MAX_PATH) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            num_cpus = min(num_cpus, int(quota) // int(period))
+    except (OSError, ValueError):  # No cgroup v2 CPU controller
+        pass
+    return max(1, num_cpus)
+
+
+async def _send_test_case(
+    runner: asyncio.subprocess.Process, input_data: bytes
+) -> Optional[Tuple[int, bytes, bytes]]:
+    """
+    Sends one test case to a runner process (see solution_runner.py) and returns
+    its exit status, stdout and stderr, or None if the runner died.
+    """
+    try:
+        runner.stdin.write(b"%d\n" % len(input_data))
+        runner.stdin.write(input_data)
+        await runner.stdin.drain()
+        header = await runner.stdout.readline()
+        if not header:
+            return None
+        return_code, stdout_size, stderr_size = map(int, header.split())
+        stdout = await runner.stdout.readexactly(stdout_size)
+        stderr = await runner.stdout.readexactly(stderr_size)
+    except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+        return None
+    return return_code, stdout, stderr
+
+
+async def _stop_runner(runner: asyncio.subprocess.Process):
+    """
+    Stops a runner process and waits for it to exit, which closes its pipes.
+    """
+    runner.stdin.close()
+    if runner.returncode is None:
+        # The runner leads its own process group, so this also kills the child
+        # running a test case, if any
+        try:
+            os.killpg(runner.pid, signal.SIGKILL)
+        except ProcessLookupError:  # The runner has not created its group yet
+            runner.kill()
+    await runner.communicate()
+
+
 class ExecutionResult(NamedTuple):
     verdict: str
-    stdout: str = ""
-    stderr: str = ""
+    stdout: bytes = b""
+    stderr: bytes = b""
     return_code: Optional[int] = None
 
 
@@ -24,113 +95,205 @@ class JudgeResult(NamedTuple):
     verdict: str
 
 
+# Shared results for verdicts that carry no output
+_TLE = ExecutionResult(verdict="Time Limit Exceeded")
+_JR_ACCEPTED = JudgeResult(verdict="Accepted")
+_JR_TLE = JudgeResult(verdict="Time Limit Exceeded")
+_JR_WA = JudgeResult(verdict="Wrong Answer")
+
+
 class Judge:
     def __init__(self, problem_data: Dict[str, Any]):
-        self.problem_data = problem_data
+        # Test data is kept only in its encoded form below
+        self.problem_data = {
+            k: v for k, v in problem_data.items() if k not in ("input", "output")
+        }
+
+        # Resolve and encode test cases once so every run indexes them directly
+        test_ids = [str(i) for i in range(1, problem_data["num_tests"] + 1)]
+        self._inputs = [problem_data["input"][i].encode() for i in test_ids]
+        self._expected_outputs = [problem_data["output"][i].encode() for i in test_ids]
 
-    @staticmethod
-    def _get_resource_limits_fn(time_limit_s: int, memory_limit_mb: int):
+    async def _start_runner(self, solution_path: str) -> asyncio.subprocess.Process:
         """
-        Returns a function that sets resource limits for a child process.
-        This is to be used with the preexec_fn argument of subprocess.Popen.
-        This function is only effective on Unix-like systems.
+        Starts a runner process that executes the solution once per test case.
         """
+        time_limit_s = self.problem_data["runtime_limit"]
+        memory_limit_mb = self.problem_data["memory_limit"]
 
-        def limit_resources():
-            # Set CPU time limit
-            if time_limit_s > 0:
-                import resource
-
-                resource.setrlimit(resource.RLIMIT_CPU, (time_limit_s, time_limit_s))
-
-            # Set memory limit (address space)
-            if memory_limit_mb > 0:
-                import resource
-
-                memory_bytes = memory_limit_mb * 1024 * 1024
-                resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
-
-        return limit_resources
+        # The runner sets its own resource limits, so no preexec_fn is needed
+        # and (with close_fds=False) the process is started with posix_spawn
+        # instead of fork + exec. Our file descriptors are non-inheritable by
+        # default, so they are not leaked to the solution.
+        return await asyncio.create_subprocess_exec(
+            sys.executable,
+            RUNNER_PATH,
+            solution_path,
+            str(time_limit_s),
+            str(memory_limit_mb),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            close_fds=False,
+        )
 
-    def _run_solution(self, solution_path: str, input_data: str) -> ExecutionResult:
+    async def _run_solution(
+        self, runner: asyncio.subprocess.Process, input_data: bytes
+    ) -> ExecutionResult:
         """
-        Executes a Python solution file and captures its output.
+        Executes one test case in a runner process and captures its output.
         """
         time_limit_s = self.problem_data["runtime_limit"]
-        memory_limit_mb = self.problem_data["memory_limit"]
-
-        preexec_fn = None
-        if os.name == "posix":
-            preexec_fn = self._get_resource_limits_fn(time_limit_s, memory_limit_mb)
+        # CPU time (enforced by the runner) is the real limit; this looser
+        # wall-clock limit only catches solutions that sleep or block, so
+        # sharing CPUs with other runners cannot turn Accepted into TLE
+        wall_time_limit_s = 2 * time_limit_s + 1
 
         try:
-            result = subprocess.run(
-                [sys.executable, solution_path],
-                capture_output=True,
-                text=True,
-                timeout=time_limit_s,
-                preexec_fn=preexec_fn,
-                input=input_data,
-                check=False,
+            response = await asyncio.wait_for(
+                _send_test_case(runner, input_data), timeout=wall_time_limit_s
             )
+            if response is None:
+                # The runner itself died
+                return_code = await runner.wait()
+                return ExecutionResult(
+                    verdict="Runtime Error",
+                    stderr=await runner.stderr.read(),
+                    return_code=return_code,
+                )
 
-            if result.returncode != 0 or result.stderr:
+            return_code, stdout, stderr = response
+            if return_code == -getattr(signal, "SIGXCPU", 0):
+                return _TLE  # Killed for exceeding its CPU time limit
+            if return_code != 0 or stderr:
                 return ExecutionResult(
                     verdict="Runtime Error",
-                    stdout=result.stdout,
-                    stderr=result.stderr,
-                    return_code=result.returncode,
+                    stdout=stdout,
+                    stderr=stderr,
+                    return_code=return_code,
                 )
             return ExecutionResult(
-                verdict="Executed", stdout=result.stdout, return_code=result.returncode
+                verdict="Executed", stdout=stdout, return_code=return_code
             )
 
-        except FileNotFoundError:
-            return ExecutionResult(
-                verdict="Judge Error",
-                stderr=f"Solution file '{solution_path}' not found.",
-            )
-        except subprocess.TimeoutExpired:
-            return ExecutionResult(verdict="Time Limit Exceeded")
+        except TimeoutError:
+            return _TLE
         except Exception as e:
-            print("YYYYY")
-            print(e)
+            logger.exception(f"Failed to run a test case: {e}")
             return ExecutionResult(
-                verdict="Judge Error", stderr=f"An unexpected error occurred: {e}"
+                verdict="Judge Error",
+                stderr=f"An unexpected error occurred: {e}".encode(),
             )
 
-    def run_all_tests(self, solution: str):
+    async def _run_test_cases(
+        self,
+        solution_path: str,
+        pending: Iterator[int],
+        results: List["asyncio.Future[ExecutionResult]"],
+    ):
+        """
+        Runs pending test cases one after another in a single runner process.
+        """
+        runner = None
+        try:
+            for i in pending:
+                if runner is None:
+                    try:
+                        runner = await self._start_runner(solution_path)
+                    except Exception as e:
+                        results[i].set_result(
+                            ExecutionResult(
+                                verdict="Judge Error",
+                                stderr=f"Failed to start the solution: {e}".encode(),
+                            )
+                        )
+                        break
+
+                exec_result = await self._run_solution(runner, self._inputs[i])
+                results[i].set_result(exec_result)
+                if exec_result.verdict != "Executed":
+                    break  # Judging stops at the first failing test case
+        finally:
+            if runner is not None:
+                # run_all_tests cancels workers once it has its verdict, which
+                # may happen mid-cleanup; finish reaping the runner regardless
+                cleanup = asyncio.ensure_future(_stop_runner(runner))
+                try:
+                    await asyncio.shield(cleanup)
+                except asyncio.CancelledError:
+                    await cleanup
+                    raise
+
+    async def run_all_tests(self, solution: str):
         # Write code to temporary file
         with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
             f.write(solution)
-            solution_path = f.name
+            source_path = f.name
+        compiled_path = source_path + "c"
 
-        print(f"{self.problem_data['problem_id']}")
-        print("-" * 30)
+        workers = []
+        try:
+            # Compile once so each runner skips parsing the source
+            with warnings.catch_warnings(record=True) as compile_warnings:
+                warnings.simplefilter("always")
+                try:
+                    solution_path = py_compile.compile(
+                        source_path, cfile=compiled_path, doraise=True
+                    )
+                except py_compile.PyCompileError:
+                    solution_path = None
+            if solution_path is None or compile_warnings:
+                # Run the source so syntax errors and compile warnings (e.g. an
+                # invalid escape sequence) show up in STDERR as before
+                solution_path = source_path
 
-        for i in range(1, self.problem_data["num_tests"] + 1):
-            print(f"Running Test Case #{i}...", end=" ", flush=True)
+            problem_id = self.problem_data["problem_id"]
+
+            # Test cases are independent, so spread them over one runner per core
+            # and report them in order, stopping at the first failing one
+            loop = asyncio.get_running_loop()
+            results = [loop.create_future() for _ in self._inputs]
+            pending = iter(range(len(self._inputs)))
+            num_runners = min(get_max_runners(), len(self._inputs))
+            workers = [
+                asyncio.create_task(
+                    self._run_test_cases(solution_path, pending, results)
+                )
+                for _ in range(num_runners)
+            ]
 
-            input_data = self.problem_data["input"][str(i)]
-            expected_output = self.problem_data["output"][str(i)]
+            test_cases = zip(results, self._expected_outputs)
+            for i, (result, expected_output) in enumerate(test_cases, start=1):
+                exec_result = await result
 
-            exec_result = self._run_solution(solution_path, input_data)
+                if exec_result.verdict != "Executed":
+                    logger.debug(f"{problem_id} #{i}: {exec_result.verdict}")
+                    if exec_result.stdout:
+                        stdout = exec_result.stdout.decode(errors="replace")
+                        logger.debug(f"STDOUT:\n{stdout}")
+                    if exec_result.stderr:
+                        stderr = exec_result.stderr.decode(errors="replace")
+                        logger.debug(f"STDERR:\n{stderr}")
+                    if exec_result is _TLE:
+                        return _JR_TLE
+                    return JudgeResult(verdict=exec_result.verdict)
 
-            if exec_result.verdict != "Executed":
-                print(f"Verdict: {exec_result.verdict}")
-                if exec_result.stdout:
-                    print(f"STDOUT:\n{exec_result.stdout}")
-                if exec_result.stderr:
-                    print(f"STDERR:\n{exec_result.stderr}")
-                return JudgeResult(verdict=exec_result.verdict)
+                verdict, diff = compare_outputs(exec_result.stdout, expected_output)
+                logger.debug(f"{problem_id} #{i}: {verdict}")
+                if diff:
+                    logger.debug(diff)
+                    return _JR_WA
 
-            verdict, diff = compare_outputs(exec_result.stdout, expected_output)
-            print(f"Verdict: {verdict}")
-            if diff:
-                print(diff)
-                return JudgeResult(verdict="Wrong Answer")
+            return _JR_ACCEPTED
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
-        return JudgeResult(verdict="Accepted")
+            # All runners have exited, so the solution files are no longer needed
+            for path in (source_path, compiled_path):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
 
 
 if __name__ == "__main__":
@@ -147,7 +310,7 @@ if __name__ == "__main__":
         judge = Judge(args.problem_path)
         solution = open(args.solution_path, "r").read()
         if judge.problem_config:
-            result = judge.run_all_tests(solution)
+            result = asyncio.run(judge.run_all_tests(solution))
             print(result)
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -61,7 +61,8 @@ def main():
         http_handler=request_handler,
     )
 
-    uvicorn.run(server.build(), host=args.host, port=args.port)
+    # Stay on asyncio even where uvloop is installed (see the client extra)
+    uvicorn.run(server.build(), host=args.host, port=args.port, loop="asyncio")
 
 
 if __name__ == '__main__':
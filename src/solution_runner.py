@@ -0,0 +1,239 @@
+"""
+Runs a Python solution once per test case, forking a fresh process for each.
+
+The judge starts this script once and sends it test cases over stdin, so
+interpreter startup and loading the solution are paid once instead of once per
+test case. Each test case then runs in a child forked from this process, so
+nothing the solution does (os._exit, gc.disable(), changes to sys, builtins or
+imported modules, leftover garbage) carries over to the next test case.
+
+Protocol (binary):
+    request:  b"<input length>\\n" followed by the input bytes
+    response: b"<exit status> <stdout length> <stderr length>\\n" followed by
+              the stdout and stderr bytes
+    The exit status is negative (-signal) if the child was killed by a signal,
+    e.g. -SIGXCPU once it exceeds its CPU time limit.
+
+In the child, file descriptors 0, 1 and 2 are redirected to temporary files,
+so the solution behaves as if it was started on its own.
+"""
+
+import atexit
+import builtins
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import traceback
+import types
+import warnings
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+CHUNK_SIZE = 65536
+
+# The solution may replace os._exit; children must still exit for real
+_exit = os._exit
+
+
+def load_solution(solution_path: str):
+    """
+    Returns the solution's code object (or the SyntaxError raised compiling it)
+    and the warnings raised compiling it.
+    """
+    with open(solution_path, "rb") as f:
+        data = f.read()
+    if solution_path.endswith(".pyc"):
+        return marshal.loads(data[16:]), []  # Skip the .pyc header
+    # Compile warnings are replayed in each test case, where a standalone run
+    # would print them
+    with warnings.catch_warnings(record=True) as compile_warnings:
+        try:
+            code = compile(data, solution_path, "exec")
+        except SyntaxError as e:
+            code = e
+    return code, compile_warnings
+
+
+def set_cpu_time_limit(time_limit_s: int):
+    """
+    Limits the process to time_limit_s seconds of CPU time.
+    The process is killed with SIGXCPU once the limit is exceeded.
+    """
+    if resource is None or time_limit_s <= 0:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (time_limit_s, hard))
+
+
+def set_memory_limit(memory_limit_mb: int):
+    """
+    Limits the address space of the process to memory_limit_mb megabytes.
+    """
+    if resource is None or memory_limit_mb <= 0:
+        return
+    memory_bytes = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def execute(code, solution_path: str, compile_warnings: list) -> int:
+    """
+    Executes the solution as the __main__ module and returns its exit status.
+    """
+    for w in compile_warnings:
+        warnings.showwarning(w.message, w.category, w.filename, w.lineno)
+    if isinstance(code, SyntaxError):
+        traceback.print_exception_only(type(code), code)
+        return 1
+
+    main_module = types.ModuleType("__main__")
+    main_module.__file__ = solution_path
+    main_module.__builtins__ = builtins
+    sys.modules["__main__"] = main_module
+    sys.argv = [solution_path]
+
+    status = 0
+    try:
+        exec(code, main_module.__dict__)
+    except SystemExit as e:
+        status = handle_system_exit(e)
+    except BaseException as e:
+        # Drop this frame so the traceback matches a standalone run
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        status = 1
+
+    # Like interpreter shutdown, wait for threads started by the solution and
+    # then run its atexit handlers
+    for thread in threading.enumerate():
+        if thread is not threading.main_thread() and not thread.daemon:
+            thread.join()
+    atexit._run_exitfuncs()
+    return status
+
+
+def handle_system_exit(e: SystemExit) -> int:
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code & 0xFF
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def run_child(
+    code,
+    solution_path: str,
+    compile_warnings: list,
+    stdin_fd: int,
+    stdout_fd: int,
+    stderr_fd: int,
+):
+    """
+    Runs the solution in a forked child and exits with its exit status.
+    """
+    status = 1
+    try:
+        os.dup2(stdin_fd, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", buffering=1, closefd=False)
+
+        status = execute(code, solution_path, compile_warnings)
+
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):  # Closed by the solution
+                pass
+    finally:
+        _exit(status)
+
+
+def copy_exactly(src, dst, size: int):
+    """
+    Copies size bytes from src to dst in chunks, so test data never has to be
+    held in memory (where it would count against the solution's memory limit).
+    """
+    while size > 0:
+        chunk = src.read(min(size, CHUNK_SIZE))
+        if not chunk:
+            raise EOFError("Unexpected end of test case data")
+        dst.write(chunk)
+        size -= len(chunk)
+
+
+def run_test_case(
+    code,
+    solution_path: str,
+    compile_warnings: list,
+    time_limit_s: int,
+    requests,
+    input_size: int,
+    responses,
+):
+    with (
+        tempfile.TemporaryFile() as stdin_file,
+        tempfile.TemporaryFile() as stdout_file,
+        tempfile.TemporaryFile() as stderr_file,
+    ):
+        copy_exactly(requests, stdin_file, input_size)
+        stdin_file.seek(0)
+
+        pid = os.fork()
+        if pid == 0:
+            set_cpu_time_limit(time_limit_s)
+            run_child(
+                code,
+                solution_path,
+                compile_warnings,
+                stdin_file.fileno(),
+                stdout_file.fileno(),
+                stderr_file.fileno(),
+            )
+        _, wait_status = os.waitpid(pid, 0)
+        status = os.waitstatus_to_exitcode(wait_status)
+
+        stdout_size = os.fstat(stdout_file.fileno()).st_size
+        stderr_size = os.fstat(stderr_file.fileno()).st_size
+        responses.write(b"%d %d %d\n" % (status, stdout_size, stderr_size))
+        stdout_file.seek(0)
+        copy_exactly(stdout_file, responses, stdout_size)
+        stderr_file.seek(0)
+        copy_exactly(stderr_file, responses, stderr_size)
+        responses.flush()
+
+
+def main():
+    solution_path = sys.argv[1]
+    time_limit_s = int(sys.argv[2])
+    memory_limit_mb = int(sys.argv[3])
+
+    # Lead a process group of our own, so the judge can kill this runner
+    # together with a child that is still running a test case
+    os.setpgid(0, 0)
+
+    requests = sys.stdin.buffer
+    responses = sys.stdout.buffer
+
+    set_memory_limit(memory_limit_mb)
+    code, compile_warnings = load_solution(solution_path)
+    while header := requests.readline():
+        run_test_case(
+            code,
+            solution_path,
+            compile_warnings,
+            time_limit_s,
+            requests,
+            int(header),
+            responses,
+        )
+
+
+if __name__ == "__main__":
+    main()
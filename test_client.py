@@ -1,28 +1,141 @@
 import asyncio
-import json
 import os
+import time
 from uuid import uuid4
 
 import httpx
+import orjson
 from a2a.client import (
     A2ACardResolver,
+    Client,
     ClientConfig,
     ClientFactory,
 )
-from a2a.types import Message, Role, TextPart, TransportProtocol
+from a2a.types import (
+    AgentCard,
+    Message,
+    Role,
+    TaskState,
+    TextPart,
+    TransportProtocol,
+)
 from loguru import logger
+from pydantic import ValidationError
+
+try:
+    import uvloop
+except ImportError:  # Not available on Windows
+    uvloop = None
 
 logger.remove()
 log_file_path = "logs/client.log"
-if os.path.exists(log_file_path):
-    with open(log_file_path, "w") as f:
-        f.truncate(0)  # Erase all contents
-logger.add(log_file_path)
+# Write from a background thread in large chunks, off the event loop.
+# mode="w" erases the previous contents, and loguru creates logs/ if needed.
+logger.add(
+    log_file_path,
+    mode="w",
+    level=os.environ.get("LOG_LEVEL", "INFO"),
+    enqueue=True,
+    buffering=65536,
+)
+
+PAYLOAD = {
+    "participants": {"agent": "http://usaco-purple-agent:9009"},
+    "config": {"problem_ids": ["259_bronze_cow_race", "396_bronze_secret_code"]},
+}
+PAYLOAD_TEXT = orjson.dumps(PAYLOAD).decode()  # The payload is fixed, encode it once
+
+# Debug dumps are compact unless PRETTY_LOG is set
+DUMP_OPTION = orjson.OPT_INDENT_2 if os.environ.get("PRETTY_LOG") else 0
+
+AGENT_CARD_CACHE_PATH = "logs/agent_card.json"
+AGENT_CARD_CACHE_TTL_S = 3600
+
+
+async def get_agent_card(resolver: A2ACardResolver, base_url: str) -> AgentCard:
+    """
+    Returns the agent card of base_url, fetching it only when the card cached
+    by an earlier run is missing, older than the TTL or for another URL.
+    """
+    try:
+        cache_age_s = time.time() - os.path.getmtime(AGENT_CARD_CACHE_PATH)
+        if cache_age_s < AGENT_CARD_CACHE_TTL_S:
+            with open(AGENT_CARD_CACHE_PATH, "rb") as f:
+                cached = orjson.loads(f.read())
+            if cached["base_url"] == base_url:
+                return AgentCard.model_validate(cached["card"])
+    except (OSError, orjson.JSONDecodeError, KeyError, ValidationError):
+        pass  # Fetch a fresh card below
+
+    card = await resolver.get_agent_card()
+    os.makedirs(os.path.dirname(AGENT_CARD_CACHE_PATH), exist_ok=True)
+    with open(AGENT_CARD_CACHE_PATH, "wb") as f:
+        cached = {"base_url": base_url, "card": card.model_dump(mode="json")}
+        f.write(orjson.dumps(cached))
+    return card
+
+
+async def receive_responses(client: Client, msg: Message, queue: asyncio.Queue):
+    """
+    Puts the responses to msg on the queue, followed by None when they end.
+    """
+    try:
+        async for response in client.send_message(msg):
+            await queue.put(response)
+    finally:
+        await queue.put(None)
+
+
+async def show_responses(queue: asyncio.Queue):
+    """
+    Prints and logs the responses from the queue until it yields None.
+    """
+    # Bind once instead of looking these up again for every response
+    dumps = orjson.dumps
+    debug_lazy = logger.opt(lazy=True).debug
+    info = logger.info
+
+    while (response := await queue.get()) is not None:
+        task, _ = response
+        # Only dump the task if a sink accepts DEBUG records
+        debug_lazy(
+            "Server response:\n{}",
+            lambda: dumps(
+                task.model_dump(mode="json", exclude_none=True),
+                option=DUMP_OPTION,
+            ).decode(),
+        )
+
+        # Read only the fields shown below instead of dumping the whole task
+        messages = []
+        if task.status.state == TaskState.completed:
+            for part in task.artifacts[0].parts:
+                part = part.root
+                if isinstance(part, TextPart) and part.text:
+                    text = part.text
+                else:
+                    text = dumps(part.data).decode()
+                messages.append(f"Agent: {text}")
+        else:
+            messages.append(f"Agent: {task.status.message.parts[0].root.text}")
+
+        # One write to stdout and one log record per response
+        message = "\n".join(messages)
+        print(message)
+        info(message)
 
 
 async def main():
     base_url = "http://usaco-green-agent:9009"
-    async with httpx.AsyncClient(timeout=120) as httpx_client:
+    # HTTP/2 is negotiated over TLS, so it takes effect for https:// base URLs
+    limits = httpx.Limits(
+        max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0
+    )
+    # Fail fast on connecting, but give the evaluation time to respond
+    timeout = httpx.Timeout(120.0, connect=10.0, write=30.0, pool=30.0)
+    async with httpx.AsyncClient(
+        http2=True, limits=limits, timeout=timeout
+    ) as httpx_client:
         # Initialize A2ACardResolver
         # agent_card_path uses default, extended_agent_card_path also uses default
         resolver = A2ACardResolver(
@@ -30,8 +143,8 @@ async def main():
             base_url=base_url,
         )
 
-        # Fetches from default public path
-        public_card = await resolver.get_agent_card()
+        # Fetches from default public path, unless a recent run cached the card
+        public_card = await get_agent_card(resolver, base_url)
 
         config = ClientConfig(
             httpx_client=httpx_client,
@@ -45,39 +158,21 @@ async def main():
         factory = ClientFactory(config)
         client = factory.create(public_card)
 
-        payload = {
-            "participants": {"agent": "http://usaco-purple-agent:9009"},
-            "config": {
-                "problem_ids": ["259_bronze_cow_race", "396_bronze_secret_code"]
-            },
-        }
         msg = Message(
             role=Role.user,
-            parts=[TextPart(text=json.dumps(payload))],
-            message_id=str(uuid4()),
+            parts=[TextPart(text=PAYLOAD_TEXT)],
+            message_id=uuid4().hex,
         )
 
-        async for response in client.send_message(msg):
-            task, _ = response
-            response_data = task.model_dump(mode="json", exclude_none=True)
-            logger.debug(f"Server response:\n{json.dumps(response_data, indent=2)}")
-
-            if response_data["status"]["state"] == "completed":
-                for part in response_data["artifacts"][0]["parts"]:
-                    if part.get("text", None):
-                        text = part["text"]
-                    else:
-                        text = json.dumps(part["data"])
-                    message = f"Agent: {text}"
-                    print(message)
-                    logger.info(message)
-            else:
-                message = (
-                    f"Agent: {response_data['status']['message']['parts'][0]['text']}"
-                )
-                print(message)
-                logger.info(message)
+        # Format each response while the next one is being received
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+        await asyncio.gather(
+            receive_responses(client, msg, queue), show_responses(queue)
+        )
+
+    await logger.complete()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    asyncio.run(main(), loop_factory=loop_factory)
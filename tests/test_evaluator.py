@@ -0,0 +1,65 @@
+import pytest
+
+from evaluator import compare_outputs
+
+
+@pytest.mark.parametrize(
+    "actual, expected",
+    [
+        (b"1 2\n3\n", b"1 2\n3\n"),
+        (b"1 2\r\n3\r\n", b"1 2\n3\n"),  # CRLF
+        (b"1 2\r3\r", b"1 2\n3\n"),  # Lone CR
+        (b"1 2\n3\n", b"1 2\r\n3\r\n"),
+        (b"1 2\n3", b"1 2\n3\n\n\n"),  # Trailing blank lines
+        (b"1 2\n3\n\n", b"1 2\n3"),
+        (b"1 2   \n3\t\n", b"1 2\n3\n"),  # Trailing whitespace on a line
+        (b"\n  1 2\n3", b"1 2\n3\n"),  # Leading whitespace of the whole output
+        (b"", b"\n"),
+    ],
+)
+def test_accepted(actual, expected):
+    assert compare_outputs(actual, expected) == ("Accepted", None)
+
+
+@pytest.mark.parametrize(
+    "actual, expected, message",
+    [
+        (
+            b"1\n2\n4\n",
+            b"1\n2\n3\n",
+            "Mismatch at line 3:\n  Expected: 3\n  Got     : 4",
+        ),
+        (
+            b"1\n 2\n",  # Leading whitespace within the output is significant
+            b"1\n2\n",
+            "Mismatch at line 2:\n  Expected: 2\n  Got     :  2",
+        ),
+        (
+            b"1\r\n2\r\n",
+            b"1\n2\n3\n",
+            "Mismatch at line 3:\n  Expected: 3\n  Got     : [EOF]",
+        ),
+        (
+            b"1\n2\n3\n",
+            b"1\n2\n",
+            "Mismatch at line 3:\n  Expected: [EOF]\n  Got     : 3",
+        ),
+        (
+            b"",
+            b"1\n",
+            "Mismatch at line 1:\n  Expected: 1\n  Got     : [EOF]",
+        ),
+        (
+            b"1\n\n2\n",  # Blank lines within the output are significant
+            b"1\n2\n",
+            "Mismatch at line 2:\n  Expected: 2\n  Got     : ",
+        ),
+        (
+            b"\xff\n",
+            b"1\n",
+            "Mismatch at line 1:\n  Expected: 1\n  Got     : �",
+        ),
+    ],
+)
+def test_wrong_answer(actual, expected, message):
+    assert compare_outputs(actual, expected) == ("Wrong Answer", message)
@@ -0,0 +1,83 @@
+import pytest
+
+from judge import Judge, get_max_runners
+
+
+def make_problem(num_tests: int = 3, runtime_limit: int = 1) -> dict:
+    """A problem whose answer is its input echoed back."""
+    data = {str(i): f"{i}\n" for i in range(1, num_tests + 1)}
+    return {
+        "problem_id": "echo",
+        "num_tests": num_tests,
+        "runtime_limit": runtime_limit,
+        "memory_limit": 256,
+        "input": data,
+        "output": data,
+    }
+
+
+async def judge(solution: str, **problem) -> str:
+    result = await Judge(make_problem(**problem)).run_all_tests(solution)
+    return result.verdict
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "solution, verdict",
+    [
+        ("print(input())", "Accepted"),
+        ("print(int(input()) + 1)", "Wrong Answer"),
+        ("print(1 / 0)", "Runtime Error"),
+        ("print(input()", "Runtime Error"),  # Syntax error
+        ('print(input()) if "\\d" else None', "Runtime Error"),  # SyntaxWarning
+        ("while True: pass", "Time Limit Exceeded"),  # CPU time limit
+        ("import time; time.sleep(5)", "Time Limit Exceeded"),  # Wall time limit
+        ("import sys; print(input()); sys.exit()", "Accepted"),
+        ("import sys; print(input()); sys.exit(0)", "Accepted"),
+        ("import sys; print(input()); sys.exit(1)", "Runtime Error"),
+        ("import sys; print(input()); sys.exit('failed')", "Runtime Error"),
+    ],
+)
+async def test_verdicts(solution, verdict):
+    assert await judge(solution) == verdict
+
+
+@pytest.mark.asyncio
+async def test_os_exit_after_output():
+    solution = "import os, sys\nprint(input())\nsys.stdout.flush()\nos._exit(0)\n"
+    assert await judge(solution) == "Accepted"
+
+
+@pytest.mark.asyncio
+async def test_state_does_not_leak_between_test_cases():
+    solution = (
+        "import builtins, gc, sys\n"
+        "if hasattr(sys, 'judged'):\n"
+        "    sys.exit(1)\n"
+        "sys.judged = True\n"
+        "gc.disable()\n"
+        "print(input())\n"
+        "builtins.input = None\n"
+    )
+    assert await judge(solution, num_tests=5) == "Accepted"
+
+
+@pytest.mark.asyncio
+async def test_atexit_handlers_run():
+    solution = "import atexit\nanswer = input()\natexit.register(print, answer)\n"
+    assert await judge(solution) == "Accepted"
+
+
+@pytest.mark.asyncio
+async def test_runners_sharing_cpus_stay_within_cpu_time_limit(monkeypatch):
+    # More runners than CPUs slows each down in wall-clock time, but CPU time
+    # is what counts against the limit
+    monkeypatch.setenv("JUDGE_MAX_RUNNERS", str(4 * get_max_runners()))
+    solution = (
+        "import time\n"
+        "end = time.process_time() + 0.6\n"
+        "while time.process_time() < end:\n"
+        "    pass\n"
+        "print(input())\n"
+    )
+    assert await judge(solution, num_tests=4 * get_max_runners()) == "Accepted"
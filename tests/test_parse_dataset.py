@@ -0,0 +1,85 @@
+import asyncio
+import io
+import os
+import zipfile
+
+import httpx
+import pytest
+
+pytest.importorskip("stream_unzip")
+pytest.importorskip("tqdm")
+
+import parse_dataset  # noqa: E402
+
+PROBLEM_ID = "259_bronze_cow_race"
+OUTPUT_SIZE = 600000
+
+
+def make_problem() -> dict:
+    problem = {key: None for key in parse_dataset._CONFIG_KEYS}
+    problem.update(
+        problem_id=PROBLEM_ID,
+        test_data_link="https://example.com/tests.zip",
+        num_tests=1,
+    )
+    return problem
+
+
+def make_archive() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr("I.1", b"1\n")
+        archive.writestr("O.1", os.urandom(OUTPUT_SIZE))
+    return buffer.getvalue()
+
+
+class DroppedStream(httpx.AsyncByteStream):
+    """Sends the first half of the data, then fails like a dropped connection."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data[: len(self.data) // 2]
+        raise httpx.ReadError("Connection dropped")
+
+
+async def download(archive: bytes, dropped: bool = False) -> str:
+    def handler(request):
+        if dropped:
+            return httpx.Response(200, stream=DroppedStream(archive))
+        return httpx.Response(200, content=archive)
+
+    transport = httpx.MockTransport(handler)
+    async with httpx.AsyncClient(transport=transport) as client:
+        item = (PROBLEM_ID, make_problem())
+        return await parse_dataset.process_problem(client, asyncio.Semaphore(1), item)
+
+
+@pytest.mark.asyncio
+async def test_interrupted_download_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    problem_path = tmp_path / "problems" / PROBLEM_ID
+    archive = make_archive()
+
+    result = await download(archive, dropped=True)
+    assert result.startswith("Failed to download")
+    assert not (problem_path / "config.json").exists()
+    assert not (problem_path / "1.out").exists()
+    assert not (problem_path / "O.1").exists()
+
+    assert await download(archive) == f"Successfully processed {PROBLEM_ID}"
+    assert (problem_path / "1.out").stat().st_size == OUTPUT_SIZE
+    assert await download(archive) == f"Cached {PROBLEM_ID}"
+
+
+@pytest.mark.asyncio
+async def test_incomplete_archive_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("I.1", b"1\n")
+
+    result = await download(buffer.getvalue())
+    assert result.startswith(f"Error for {PROBLEM_ID}: Missing output file")
+    assert not (tmp_path / "problems" / PROBLEM_ID / "config.json").exists()